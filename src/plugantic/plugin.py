@@ -3,6 +3,7 @@ from pydantic import BaseModel, ConfigDict, GetCoreSchemaHandler, Field
 from pydantic_core.core_schema import CoreSchema, union_schema, tagged_union_schema, literal_schema, no_info_plain_validator_function, json_or_python_schema
 from typing_extensions import Any, Self, Literal, Union, ClassVar, Tuple, Set, Dict, Mapping, Type, TypeVar, TypeVarTuple, TypeAlias, Iterable, Collection, Callable, TypeIs, Sentinel, get_origin, get_args, get_type_hints, overload, TYPE_CHECKING
 from propert import classproperty, cached_classproperty
+from weakref import WeakKeyDictionary
 
 _LiteralType: TypeAlias = Union[str, int, float, bool, None]
 
@@ -25,6 +26,9 @@ def ensure_literal_value_collection(value: _LiteralType|Collection[_LiteralType]
 
 DEFAULT_LITERAL: Any = Sentinel("DEFAULT_LITERAL")
 
+_plugantic_generation: int = 0
+"""Bumped whenever a new PluginModel subclass is defined, so memoized option collections can detect staleness"""
+
 _CollectedSubclassesType = Mapping[str, Mapping[_LiteralType, Collection[Type["PluginModel"]]]]
 _CollectedShorthandsType = Mapping[_LiteralType, "PluginModel|Callable[[], PluginModel]"]
 _CollectedOptionsType = Tuple[_CollectedSubclassesType, _CollectedShorthandsType]
@@ -55,9 +59,13 @@ class PluginModel(BaseModel):
     __plugantic_shorthands__: ClassVar[Dict[_LiteralType, Self|Callable[[], Self]]] = {}
     __plugantic_discriminator__: ClassVar[str] = "type"
     __plugantic_collected_options__: ClassVar[_CollectedOptionsType|None] = None
+    __plugantic_options_collected__: ClassVar[bool] = False # sticky marker set once options were collected; later subclasses inherit it through the mro, so the changes-allowed check is a single attribute load instead of an mro walk
     __plugantic_check_collected__: ClassVar[bool] = True
     __plugantic_show_in_schema__: ClassVar[bool|None] = None
     __plugantic_show_sub_in_schema__: ClassVar[bool] = True
+    __plugantic_registry__: ClassVar["WeakKeyDictionary[Type[PluginModel], WeakKeyDictionary[Type[PluginModel], None]]"] = WeakKeyDictionary() # maps every plugin class to its known descendants; the inner mapping is used as an ordered weak set, so descendants are iterated in definition order while dynamically created subclasses can still be garbage collected (like the __subclasses__ walk this replaces)
+    __plugantic_value_annotation_cache__: ClassVar[Tuple[Any]|None] = None # 1-tuple so a cached None can be told apart from "not cached yet"
+    __plugantic_default_value__: ClassVar[_LiteralType] = _LiteralUnset # first declared value, precomputed at class creation so __init__ doesn't have to look it up per instance
 
     if TYPE_CHECKING:
         model_config: ClassVar[ConfigDict|PluganticConfigDict]
@@ -111,13 +119,13 @@ class PluginModel(BaseModel):
     
     if not TYPE_CHECKING:
         def __init__(self, *args, **kwargs):
-            if self.__plugantic_declared_values__:
-                # if the discriminator value is explicitly set to the default sentinel, remove it so a valid value can be set
-                if kwargs.get(self.__plugantic_discriminator__, None) is DEFAULT_LITERAL:
-                    kwargs.pop(self.__plugantic_discriminator__)
-
-                # if no value is provided for the discriminator (or if it was explicitly unset/removed by the previous rules), set it to the first declared value so the model can be validated
-                kwargs.setdefault(self.__plugantic_discriminator__, next(iter(self.__plugantic_declared_values__)))
+            default = type(self).__plugantic_default_value__
+            if default is not _LiteralUnset:
+                discriminator = self.__plugantic_discriminator__
+                # if the discriminator is missing or explicitly set to the default sentinel, set it to the precomputed first declared value so the model can be validated; a single lookup plus at most one store instead of get/pop/setdefault
+                value = kwargs.get(discriminator, _LiteralUnset)
+                if value is DEFAULT_LITERAL or value is _LiteralUnset:
+                    kwargs[discriminator] = default
             super().__init__(*args, **kwargs)
 
     def __init_subclass__(cls, *,
@@ -138,7 +146,12 @@ class PluginModel(BaseModel):
 
         if not cls._are_plugantic_changes_allowed():
             raise ValueError("Cannot create a new PluginModel subclass after the plugin schema for it has been created. Make sure to define all PluginModel subclasses before using them in a PluginAdapter or similar or make sure the consumer of PluginAdapter uses `defer_build` or similar mechanisms.")
-        
+
+        # the subclass tree changed, so any options already collected on an ancestor are stale and have to be collected again for schemas built later (only reachable with allow_changes_after_collection, otherwise the check above raises)
+        for supcls in cls.__mro__[1:]:
+            if supcls.__dict__.get("__plugantic_collected_options__") is not None:
+                supcls.__plugantic_collected_options__ = None
+
         cls.__plugantic_show_in_schema__ = cls.model_config.get("show_in_schema", show_in_schema)
 
         show_sub_in_schema_mc = cls.model_config.get("show_sub_in_schema", None)
@@ -163,11 +176,22 @@ class PluginModel(BaseModel):
             values_set = cls._get_declared_plugantic_values_from_annotations()
         if values_set is not None:
             cls.__plugantic_declared_values__ = values_set
+            cls.__plugantic_default_value__ = next(iter(values_set), _LiteralUnset)
             cls._create_plugantic_annotation()
 
         if kwargs:
             raise ValueError(f"Unexpected keyword arguments in subclass definition: {kwargs.keys()}")
 
+        global _plugantic_generation
+        _plugantic_generation += 1
+
+        registry = PluginModel.__plugantic_registry__
+        registry[cls] = WeakKeyDictionary()
+        for supcls in cls.__mro__[1:]:
+            descendants = registry.get(supcls)
+            if descendants is not None:
+                descendants[cls] = None
+
         super().__init_subclass__(**kwargs)
 
     @classmethod
@@ -180,16 +204,22 @@ class PluginModel(BaseModel):
         Create an annotation of value for the given name as a member variable of the class
         e.g. name="type" value=Literal["test"] -> `type: Literal["test"]`
         """
-        if not hasattr(cls, "__annotations__"):
-            cls.__annotations__ = {}
+        annotations = cls.__dict__.get("__annotations__") # only check the own class dict, hasattr would walk the mro and find (and later mutate) an inherited annotations dict
+        if annotations is None:
+            annotations = {}
+            cls.__annotations__ = annotations
         existing_annotation = cls._get_plugantic_value_annotations()
         value = cls._make_plugantic_literal()
         if existing_annotation == value:
             return
-        cls.__annotations__[cls.__plugantic_discriminator__] = value
+        annotations[cls.__plugantic_discriminator__] = value
+        cls.__plugantic_value_annotation_cache__ = None # annotations changed, invalidate the cached lookup
 
     @classmethod
     def _get_plugantic_value_annotations(cls):
+        cached = cls.__dict__.get("__plugantic_value_annotation_cache__", None) # only check the own class dict so a parent's cached value is not inherited
+        if cached is not None:
+            return cached[0]
         annotation = None
         try:
             annotation = get_type_hints(cls).get(cls.__plugantic_discriminator__, None)
@@ -199,6 +229,7 @@ class PluginModel(BaseModel):
         #    field = cls.model_fields.get(cls.__plugantic_discriminator__, None)
         #    if field:
         #        annotation = field.annotation
+        cls.__plugantic_value_annotation_cache__ = (annotation,)
         return annotation
 
     @classmethod
@@ -214,12 +245,7 @@ class PluginModel(BaseModel):
     def _are_plugantic_changes_allowed(cls):
         if not cls.__plugantic_check_collected__:
             return True
-        for supcls in cls.mro():
-            if not issubclass(supcls, PluginModel):
-                continue
-            if supcls.__plugantic_collected_options__ is not None:
-                return False
-        return True
+        return not cls.__plugantic_options_collected__
 
     @classmethod
     def _should_show_in_schema(cls):
@@ -234,28 +260,37 @@ class PluginModel(BaseModel):
         
         subclasses: _MutableOptionsDiscriminator = {}
         shorthands: _MutableOptionsLiterals = {}
-        if cls._should_show_in_schema():
-            for value in cls.__plugantic_declared_values__:
-                subclasses.setdefault(cls.__plugantic_discriminator__, {}).setdefault(value, set()).add(cls)
-        for shorthand, item in cls.__plugantic_shorthands__.items():
-            shorthands[shorthand] = item
-            
-        for subcls in cls.__subclasses__():
-            subclasses_sub, shorthands_sub = subcls._collect_plugantic_options()
-            for discriminator, subcls_map in subclasses_sub.items():
-                for value, subcls_set in subcls_map.items():
-                    subclasses.setdefault(discriminator, {}).setdefault(value, set()).update(subcls_set)
-            for shorthand, item in shorthands_sub.items():
-                if shorthands.get(shorthand, item) != item:
+
+        # every descendant is already known from the registry, so the whole tree is covered without a recursive __subclasses__ walk (and its per-level weakref sweeps)
+        descendants = PluginModel.__plugantic_registry__.get(cls, ())
+        subclasses_setdefault = subclasses.setdefault # bind the per-node lookups once, they would otherwise be resolved for every class in the tree
+        shorthands_get = shorthands.get
+        for subcls in (cls, *descendants):
+            declared_values = subcls.__plugantic_declared_values__
+            if declared_values and subcls._should_show_in_schema():
+                choices = subclasses_setdefault(subcls.__plugantic_discriminator__, {})
+                choices_setdefault = choices.setdefault
+                for value in declared_values:
+                    choices_setdefault(value, set()).add(subcls)
+            for shorthand, item in subcls.__plugantic_shorthands__.items():
+                if shorthands_get(shorthand, item) != item:
                     raise ValueError(f"Shorthand {shorthand} was given to multiple items: {item!r} and {shorthands[shorthand]!r}")
                 shorthands[shorthand] = item
 
         cls.__plugantic_collected_options__ = subclasses, shorthands
+        if not cls.__dict__.get("__plugantic_options_collected__"): # avoid rewriting the sticky flag (and the metaclass descriptor machinery behind class attribute writes) when the class was collected before
+            cls.__plugantic_options_collected__ = True
         return subclasses, shorthands
 
+PluginModel.__plugantic_registry__[PluginModel] = WeakKeyDictionary() # PluginModel itself never passes through __init_subclass__, so it has to be seeded manually
+
 T = TypeVar("T", bound=PluginModel)
 Ts = TypeVarTuple("Ts")
 
+def _is_plugin_model_class(item: Any) -> TypeIs[Type[PluginModel]]:
+    # equivalent to isinstance(item, type) and issubclass(item, PluginModel), but a plain mro scan instead of the ABCMeta subclass-check machinery that pydantics model metaclass inherits
+    return isinstance(item, type) and PluginModel in item.__mro__
+
 class _PluginMeta:
     @property
     def _plugin_union_expansion(self) -> Tuple["_PluginMeta", ...]:
@@ -327,13 +362,13 @@ class _PluginMeta:
                 if not options:
                     continue
 
-                options_ordered = sorted(options, key=lambda x: x.__plugantic_order__, reverse=True)
+                options_ordered = sorted(options, key=lambda x: (-x.__plugantic_order__, -len(x.model_fields), x.__module__, x.__qualname__)) # deepest (and most specific) plugins first; the module/qualname keys make the order total, so ties never fall back to id-dependent set iteration order
                 schemas_ordered = [handler.generate_schema(option) for option in options_ordered]
 
                 if len(schemas_ordered) == 1:
                     schema_option = schemas_ordered[0]
                 else:
-                    schema_option = union_schema(list(schemas_ordered), mode="left_to_right")
+                    schema_option = union_schema(schemas_ordered, mode="left_to_right")
 
                 choices_discriminator[value] = schema_option
             schemas.append(tagged_union_schema(choices_discriminator, discriminator))
@@ -354,7 +389,7 @@ class _PluginWrapper(_PluginMeta):
         self._plugin_type = plugin_type
 
     def __class_getitem__(cls, item):
-        if not isinstance(item, type) or not issubclass(item, PluginModel):
+        if not _is_plugin_model_class(item):
             raise TypeError(f"PluginAdapter can only be used with {PluginModel.__name__} subclasses, got {item}")
         return cls(item)
     
@@ -367,16 +402,18 @@ class _PluginWrapper(_PluginMeta):
 class _PluginMultiMeta(_PluginMeta):
     def __init__(self, *plugin_types: _PluginMeta):
         self._plugin_types = plugin_types
+        self._collected_options_cache: _CollectedOptionsType|None = None
+        self._collected_options_generation: int = -1
 
     def __class_getitem__(cls, item):
         if not isinstance(item, tuple):
             item = (item,)
         items = set()
         for plugin_type in item:
-            if isinstance(plugin_type, type) and issubclass(plugin_type, PluginModel):
+            if not isinstance(plugin_type, _PluginMeta): # single check for the common case, only non-meta items need the PluginModel-class fallback
+                if not _is_plugin_model_class(plugin_type):
+                    raise TypeError(f"{cls.__name__.lstrip('_')} can only be used with PluginMeta types (e.g. PluginAdapter, PluginUnion, PluginIntersection), got {plugin_type}")
                 plugin_type = PluginAdapter[plugin_type]
-            if not isinstance(plugin_type, _PluginMeta):
-                raise TypeError(f"{cls.__name__.lstrip('_')} can only be used with PluginMeta types (e.g. PluginAdapter, PluginUnion, PluginIntersection), got {plugin_type}")
             items.add(plugin_type)
         return cls(*items)
     
@@ -384,7 +421,17 @@ class _PluginMultiMeta(_PluginMeta):
     def _check_isinstance(self, instance):
         if not self._plugin_types:
             return False
-        return self._check_isinstance_iterator(t._check_isinstance(instance) for t in self._plugin_types) 
+        return self._check_isinstance_iterator(t._check_isinstance(instance) for t in self._plugin_types)
+
+    def _collect_plugantic_options(self):
+        # memoize the merged options so repeated schema builds don't redo the merge; a changed generation means new subclasses were defined since, so the merge has to be redone
+        if self._collected_options_generation != _plugantic_generation:
+            self._collected_options_cache = self._collect_plugantic_options_combined()
+            self._collected_options_generation = _plugantic_generation
+        return self._collected_options_cache
+
+    @abstractmethod
+    def _collect_plugantic_options_combined(self) -> _CollectedOptionsType|None: ...
 
 class _PluginUnion(_PluginMultiMeta):
     @property
@@ -393,7 +440,7 @@ class _PluginUnion(_PluginMultiMeta):
     
     _check_isinstance_iterator = any
 
-    def _collect_plugantic_options(self):
+    def _collect_plugantic_options_combined(self):
         options_discriminators: _MutableOptionsDiscriminator = {}
         options_literals: _MutableOptionsLiterals = {}
 
@@ -404,8 +451,11 @@ class _PluginUnion(_PluginMultiMeta):
             options_discriminators_sub, options_literals_sub = options
 
             for discriminator, choices_sub in options_discriminators_sub.items():
+                if not choices_sub:
+                    continue
+                choices = options_discriminators.setdefault(discriminator, {})
                 for value, options_sub in choices_sub.items():
-                    options_discriminators.setdefault(discriminator, {}).setdefault(value, set()).update(options_sub)
+                    choices.setdefault(value, set()).update(options_sub)
             
             for literal, item in options_literals_sub.items():
                 if options_literals.get(literal, item) != item:
@@ -421,34 +471,41 @@ class _PluginIntersection(_PluginMultiMeta):
     
     _check_isinstance_iterator = all
 
-    def _collect_plugantic_options(self):
-        options_discriminators: _MutableOptionsDiscriminator|None = None
-        options_literals: _MutableOptionsLiterals|None = None
-
+    def _collect_plugantic_options_combined(self):
+        options_all = []
         for plugin_type in self._plugin_types:
             options = plugin_type._collect_plugantic_options()
             if options is None:
                 return None
-            options_discriminators_sub, options_literals_sub = options
+            options_all.append(options)
 
+        # intersect starting from the smallest operand, so every intersection step iterates over as few entries as possible
+        options_all.sort(key=lambda options: sum(len(subcls_set) for choices in options[0].values() for subcls_set in choices.values()))
+
+        options_discriminators: _MutableOptionsDiscriminator|None = None
+        options_literals: _MutableOptionsLiterals|None = None
+
+        for options_discriminators_sub, options_literals_sub in options_all:
             if options_discriminators is None:
-                options_discriminators = {v: {k: set(v) for k, v in vs.items()} for v, vs in options_discriminators_sub.items()}
+                options_discriminators = options_discriminators_sub # the fold below only reads the previous maps and builds new ones, so the first operand can be aliased instead of copied set by set
             else:
                 options_discriminators_new = {}
-                for discriminator, options_sub in options_discriminators_sub.items():
-                    if discriminator not in options_discriminators:
+                for discriminator, choices_sub in options_discriminators_sub.items():
+                    choices = options_discriminators.get(discriminator)
+                    if choices is None:
                         continue
                     options_values_new = {}
-                    for value, options_sub in options_sub.items():
-                        if value not in options_discriminators[discriminator]:
+                    for value, subcls_set in choices_sub.items():
+                        subcls_set_old = choices.get(value)
+                        if subcls_set_old is None:
                             continue
-                        options_values_new[value] = options_discriminators.get(discriminator, {}).get(value, set()).intersection(options_sub)
+                        options_values_new[value] = subcls_set_old.intersection(subcls_set)
                     if options_values_new:
                         options_discriminators_new[discriminator] = options_values_new
                 options_discriminators = options_discriminators_new
-            
+
             if options_literals is None:
-                options_literals = {**options_literals_sub}
+                options_literals = options_literals_sub
             else:
                 options_literals_new = {}
                 for literal, item in options_literals_sub.items():
@@ -457,6 +514,9 @@ class _PluginIntersection(_PluginMultiMeta):
                     options_literals_new[literal] = item
                 options_literals = options_literals_new
 
+            if not options_discriminators and not options_literals:
+                break # both intersections are already empty, no further operand can bring anything back
+
         return options_discriminators or {}, options_literals or {}
 
 if TYPE_CHECKING:
@@ -82,6 +82,29 @@ def test_schema_error_suppress():
     config = OtherConfig(config=TestImpl3(value="image"))
     assert isinstance(config.config, TestImpl3)
 
+def test_schema_refresh_after_allowed_change():
+    class TestBase(PluginModel):
+        value: str
+
+    class TestImpl1(TestBase, value="text"):
+        text: str
+
+    class OtherConfig(BaseModel):
+        config: PluginAdapter[TestBase]
+
+    class TestImpl2(TestBase, value="number", allow_changes_after_collection=True):
+        number: int|None = None
+
+    class LaterConfig(BaseModel):
+        config: PluginAdapter[TestBase]
+
+    config = LaterConfig.model_validate({"config": {
+        "type": "number",
+        "value": "number",
+    }})
+
+    assert isinstance(config.config, TestImpl2)
+
 def test_schema_no_valid_value():
     class TestBase(PluginModel):
         pass